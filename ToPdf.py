@@ -28,28 +28,42 @@ Token file:
 
 """
 
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import mmap
 import os
 import sys
 import json
+import shutil
+import subprocess
+import tempfile
+import threading
 import time
 import logging
-from typing import Optional
+from contextlib import nullcontext
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
 from random import uniform
 
-# Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+# The google client stack (discovery, oauthlib, httplib2, ...) costs several
+# hundred ms to import, so it is pulled in lazily by the functions that need
+# it; a run that finds nothing to convert never pays for it.
 
-    load_dotenv()
-except ImportError:
-    pass  # dotenv not available - user must set environment variables manually
+# Load environment variables from .env file
+if os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")):
+    try:
+        from dotenv import load_dotenv
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
+        load_dotenv()
+    except ImportError:
+        pass  # dotenv not available - user must set environment variables manually
 
 # ---------------------------------------------------------------------------
 # Embed (placeholder) OAuth client credentials.
@@ -67,6 +81,15 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INPUT_DIR = os.path.join(BASE_DIR, "input")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
+
+# All uploads are parented to a dedicated staging folder instead of My Drive
+# root, so orphans from crashed runs stay contained and can be swept later.
+STAGING_FOLDER_NAME = "ppt-converter-staging"
+FOLDER_CACHE_PATH = os.path.join(BASE_DIR, "staging_folder.json")
+
+# Sidecar cache mapping source content hash -> produced PDF, so re-runs skip
+# the upload/convert cycle even when mtimes changed but bytes did not.
+CACHE_PATH = os.path.join(BASE_DIR, "cache.json")
 SUPPORTED_MIME = {
     ".doc": ("application/msword", "application/vnd.google-apps.document"),
     ".docx": (
@@ -88,10 +111,46 @@ SUPPORTED_MIME = {
     ),
 }
 
+# Inputs already in the target format are passed straight through to the
+# output directory (hardlink when possible), no conversion involved.
+PASSTHROUGH_EXTS = {".pdf"}
+
+# Every extension discovery should pick up, precomputed once.
+ELIGIBLE_EXTS = frozenset(SUPPORTED_MIME) | PASSTHROUGH_EXTS
+
+# Modern Office-XML formats convert faithfully with LibreOffice, so when a
+# local soffice binary exists they skip the Drive round-trip entirely.
+# Legacy binary formats (.doc/.ppt/.xls) always go through Drive.
+LOCAL_FAST_PATH = {".docx", ".pptx", ".xlsx"}
+SOFFICE_TIMEOUT_SECONDS = 300
+
+# Drive allows batching metadata calls (not media); ~25 per batch keeps well
+# clear of the 500s large batches are known to trip.
+DELETE_BATCH_SIZE = 25
+
 RESUMABLE_THRESHOLD_BYTES = 5 * 1024 * 1024
 RESUMABLE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # multiple of 256 KB per API requirement
 
+# Concurrent conversions. The workload is almost pure network wait, so the
+# pool is sized well past the CPU count, capped so a large batch stays under
+# Drive quotas.
+MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Refresh the access token this long before it expires so workers never
+# stall on an on-demand refresh mid-batch.
+TOKEN_REFRESH_MARGIN_SECONDS = 300
 
+# googleapiclient's service object is thread-safe as long as every request
+# runs over its own http object, so one shared service is paired with a
+# per-thread AuthorizedHttp held here.
+_thread_local = threading.local()
+
+# Serializes token refreshes between the background refresher and any
+# worker that happens to trip an on-demand refresh first.
+_refresh_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4096)
 def _format_size(num_bytes: int) -> str:
     units = ["B", "KB", "MB", "GB", "TB"]
     size = float(num_bytes)
@@ -130,6 +189,9 @@ def load_or_authorize() -> Credentials:
     """
     Load cached credentials if present; refresh or start browser flow as needed.
     """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     creds: Optional[Credentials] = None
 
     if os.path.exists(TOKEN_PATH):
@@ -149,6 +211,8 @@ def load_or_authorize() -> Credentials:
             logging.warning("Refresh failed (%s); launching browser auth.", e)
 
     if not creds or not creds.valid:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
         logging.info(
             "Launching browser for Google OAuth consent (first-time or invalid token)."
         )
@@ -179,7 +243,12 @@ def load_or_authorize() -> Credentials:
     return creds
 
 
+_token_write_lock = threading.Lock()
+_last_token_digest: Optional[bytes] = None
+
+
 def save_credentials(creds: Credentials):
+    global _last_token_digest
     data = {
         "token": creds.token,
         "refresh_token": creds.refresh_token,
@@ -188,31 +257,415 @@ def save_credentials(creds: Credentials):
         "client_secret": creds.client_secret,
         "scopes": creds.scopes,
     }
-    try:
-        with open(TOKEN_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+    # Compact separators: the file is machine-read only, and this is the
+    # cheapest serialization the stdlib offers (matches what google-auth's
+    # own to_json produces).
+    payload = json.dumps(data, separators=(",", ":"))
+    digest = hashlib.sha256(payload.encode("utf-8")).digest()
+    with _token_write_lock:
+        if digest == _last_token_digest:
+            logging.debug("Credentials unchanged; skipping token.json write.")
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=BASE_DIR, prefix=".token.")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            try:
+                os.chmod(tmp_path, 0o600)
+            except Exception:
+                pass
+            # Atomic swap keeps the old token intact if we crash mid-write;
+            # a truncated token.json would force a browser flow on next run.
+            os.replace(tmp_path, TOKEN_PATH)
+            _last_token_digest = digest
+            logging.debug("Stored credentials at %s", TOKEN_PATH)
+        except Exception as e:
+            logging.error("Failed saving credentials: %s", e)
+
+
+def _token_refresher(creds: Credentials):
+    """
+    Daemon loop: refresh the shared token shortly before expiry so no worker
+    ever blocks on a refresh (and the hourly thundering-herd stall goes away).
+    """
+    from google.auth.transport.requests import Request
+
+    while True:
+        expiry = creds.expiry
+        if expiry is None:
+            time.sleep(TOKEN_REFRESH_MARGIN_SECONDS)
+            continue
+        sleep_s = max(
+            60,
+            (expiry - datetime.utcnow()).total_seconds()
+            - TOKEN_REFRESH_MARGIN_SECONDS,
+        )
+        time.sleep(sleep_s)
+        try:
+            with _refresh_lock:
+                creds.refresh(Request())
+            save_credentials(creds)
+            logging.info("Proactively refreshed access token.")
+        except Exception as e:
+            logging.warning("Background token refresh failed: %s", e)
+            time.sleep(60)
+
+
+def start_token_refresher(creds: Credentials):
+    if not creds.refresh_token:
+        return
+    threading.Thread(
+        target=_token_refresher,
+        args=(creds,),
+        daemon=True,
+        name="token-refresher",
+    ).start()
+
+
+def build_drive(creds: Credentials):
+    from googleapiclient.discovery import build
+
+    # One service object for the whole process, built from the bundled
+    # discovery document (static_discovery) so there is no network fetch and
+    # no per-thread re-parse. Worker threads stay safe by passing their own
+    # transport from _http_for_thread into each request they execute.
+    # cache_discovery=False suppresses the oauth2client file_cache warning.
+    return build(
+        "drive",
+        "v3",
+        http=_http_for_thread(creds),
+        cache_discovery=False,
+        static_discovery=True,
+    )
+
+
+def _http_for_thread(creds: Credentials):
+    """
+    Return this thread's AuthorizedHttp, building it on first use. Each one
+    holds a single keep-alive TLS connection reused for every call the
+    thread makes, so handshakes cost one per worker, not one per request.
+    """
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = AuthorizedHttp(creds, http=httplib2.Http())
+        _thread_local.http = http
+    return http
+
+
+_cache_lock = threading.Lock()
+_cache: Optional[dict] = None
+
+# One lock per content hash, so identical inputs in the same batch convert
+# once and the rest reuse the result instead of racing it.
+_digest_locks: dict = {}
+
+
+def _lock_for_digest(digest: str) -> threading.Lock:
+    with _cache_lock:
+        return _digest_locks.setdefault(digest, threading.Lock())
+
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+        return h.hexdigest()
+
+
+def _cache_lookup(digest: str) -> Optional[str]:
+    """Return the cached PDF path for this content hash, if any."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = {}
+            if os.path.exists(CACHE_PATH):
+                try:
+                    with open(CACHE_PATH, "r", encoding="utf-8") as f:
+                        _cache = json.load(f)
+                except Exception as e:
+                    logging.warning("Ignoring unreadable cache file: %s", e)
+        entry = _cache.get(digest)
+        return entry.get("pdf") if entry else None
+
+
+def _cache_store(digest: str, pdf_path: str):
+    with _cache_lock:
+        assert _cache is not None  # _cache_lookup always runs first
+        _cache[digest] = {"pdf": pdf_path}
+        try:
+            with open(CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump(_cache, f)
+        except OSError as e:
+            logging.warning("Could not persist conversion cache: %s", e)
+
+
+def ensure_staging_folder(drive) -> Optional[str]:
+    """
+    Find or create the Drive staging folder, caching its id on disk so
+    subsequent runs skip the lookup. Returns None if Drive root must be used.
+    """
+    folder_id = None
+    if os.path.exists(FOLDER_CACHE_PATH):
+        try:
+            with open(FOLDER_CACHE_PATH, "r", encoding="utf-8") as f:
+                folder_id = json.load(f).get("id")
+        except Exception as e:
+            logging.debug("Could not read staging folder cache: %s", e)
+    if folder_id:
         try:
-            os.chmod(TOKEN_PATH, 0o600)
+            drive.files().get(fileId=folder_id, fields="id").execute()
+            return folder_id
         except Exception:
-            pass
-        logging.debug("Stored credentials at %s", TOKEN_PATH)
+            logging.debug("Cached staging folder %s gone; re-resolving.", folder_id)
+
+    try:
+        found = (
+            drive.files()
+            .list(
+                q=(
+                    f"name='{STAGING_FOLDER_NAME}' "
+                    "and mimeType='application/vnd.google-apps.folder' "
+                    "and trashed=false"
+                ),
+                fields="files(id)",
+            )
+            .execute()
+        )
+        files = found.get("files", [])
+        if files:
+            folder_id = files[0]["id"]
+        else:
+            created = (
+                drive.files()
+                .create(
+                    body={
+                        "name": STAGING_FOLDER_NAME,
+                        "mimeType": "application/vnd.google-apps.folder",
+                    },
+                    fields="id",
+                )
+                .execute()
+            )
+            folder_id = created["id"]
+            logging.info("Created Drive staging folder (id=%s)", folder_id)
+        try:
+            with open(FOLDER_CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump({"id": folder_id}, f)
+        except OSError as e:
+            logging.debug("Could not cache staging folder id: %s", e)
+        return folder_id
     except Exception as e:
-        logging.error("Failed saving credentials: %s", e)
+        logging.warning("Could not prepare staging folder (%s); using root.", e)
+        return None
 
 
-def build_drive(creds: Credentials):
-    # cache_discovery=False suppresses the oauth2client file_cache warning
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
+class _AdaptiveGate:
+    """
+    AIMD throttle for the Drive-facing section of convert_one. Capacity
+    halves whenever Drive signals rate limiting and creeps back up by one
+    after a streak of clean successes, so concurrency tracks the quota
+    actually available instead of a fixed worker count.
+    """
+
+    SUCCESS_STREAK = 20
+
+    def __init__(self, capacity: int):
+        self._max = capacity
+        self._capacity = capacity
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self._capacity:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.SUCCESS_STREAK and self._capacity < self._max:
+                self._successes = 0
+                self._capacity += 1
+                self._cond.notify()
+                logging.debug("Concurrency raised to %d", self._capacity)
+
+    def on_rate_limit(self):
+        with self._cond:
+            if self._capacity > 1:
+                self._capacity = max(1, self._capacity // 2)
+                logging.info(
+                    "Drive rate limit hit; concurrency reduced to %d",
+                    self._capacity,
+                )
+            self._successes = 0
+
+
+_drive_gate = _AdaptiveGate(MAX_WORKERS)
+
+# Statuses worth retrying; everything else in 4xx is a permanent failure
+# (400 malformed, 401/403 auth, 404 gone) and retrying only wastes quota.
+_RETRIABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _is_rate_limited(err, status) -> bool:
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    # 403 is also plain permission denial; only quota reasons count.
+    return "ratelimitexceeded" in str(err).lower()
 
 
-def convert_one(drive, path: str, file_size: Optional[int] = None):
+_deletes_lock = threading.Lock()
+_pending_deletes: list = []
+
+
+def _delete_done(request_id, response, exception):
+    if exception is not None:
+        logging.debug("Batched delete failed for %s: %s", request_id, exception)
+
+
+def flush_deletes(drive, http=None):
+    """Drain the cleanup queue as batched metadata deletes (best effort)."""
+    while True:
+        with _deletes_lock:
+            chunk = _pending_deletes[:DELETE_BATCH_SIZE]
+            del _pending_deletes[: len(chunk)]
+        if not chunk:
+            return
+        batch = drive.new_batch_http_request(callback=_delete_done)
+        for fid in chunk:
+            batch.add(drive.files().delete(fileId=fid), request_id=fid)
+        try:
+            batch.execute(http=http)
+        except Exception as e:
+            logging.debug("Cleanup batch failed: %s", e)
+
+
+def _queue_delete(drive, file_id: str, http=None):
+    with _deletes_lock:
+        _pending_deletes.append(file_id)
+        ready = len(_pending_deletes) >= DELETE_BATCH_SIZE
+    if ready:
+        flush_deletes(drive, http)
+
+
+def _stamp_mtime(out_path: str, src_mtime_ns: int):
+    """
+    Copy the source's mtime (nanosecond precision) onto the output PDF so the
+    up-to-date check stays exact across reruns, even on filesystems with
+    coarse timestamp granularity.
+    """
+    try:
+        os.utime(out_path, ns=(src_mtime_ns, src_mtime_ns))
+    except OSError as e:
+        logging.debug("Could not stamp mtime on %s: %s", out_path, e)
+
+
+def _retry_after_seconds(err) -> Optional[float]:
+    """Parse the Retry-After header off an HttpError, if the server sent one."""
+    resp = getattr(err, "resp", None)
+    value = resp.get("retry-after") if resp else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))  # delta-seconds form
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)  # HTTP-date form
+        return max(0.0, (when - datetime.now(when.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+_soffice_path: Optional[str] = None
+_soffice_checked = False
+
+
+def _find_soffice() -> Optional[str]:
+    global _soffice_path, _soffice_checked
+    if not _soffice_checked:
+        _soffice_path = shutil.which("soffice") or shutil.which("libreoffice")
+        _soffice_checked = True
+    return _soffice_path
+
+
+def convert_local(soffice: str, path: str, out_path: str) -> bool:
+    """
+    Convert one file to PDF with LibreOffice headless (no network).
+    Returns True on success; False means the caller should fall back to Drive.
+    """
+    # Concurrent soffice instances cannot share a user profile, so each
+    # worker thread gets its own throwaway one.
+    profile_dir = os.path.join(
+        tempfile.gettempdir(), f"ppt-converter-lo-{threading.get_ident()}"
+    )
+    cmd = [
+        soffice,
+        "--headless",
+        "--norestore",
+        f"-env:UserInstallation=file://{profile_dir}",
+        "--convert-to",
+        "pdf",
+        "--outdir",
+        os.path.dirname(out_path),
+        path,
+    ]
+    try:
+        proc = subprocess.run(
+            cmd, capture_output=True, timeout=SOFFICE_TIMEOUT_SECONDS
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.warning("LibreOffice failed on %s: %s", os.path.basename(path), e)
+        return False
+    if proc.returncode != 0 or not os.path.exists(out_path):
+        logging.warning(
+            "LibreOffice exited %d for %s; falling back to Drive.",
+            proc.returncode,
+            os.path.basename(path),
+        )
+        return False
+    return True
+
+
+def convert_one(
+    drive,
+    path: str,
+    file_size: Optional[int] = None,
+    folder_id: Optional[str] = None,
+    src_mtime_ns: Optional[int] = None,
+    ext: Optional[str] = None,
+    http=None,
+):
     """
     Convert a single file with retries.
     Returns: 'success' | 'failed' | 'skipped'
     """
-    ext = os.path.splitext(path)[1].lower()
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import (
+        MediaFileUpload,
+        MediaIoBaseDownload,
+        MediaIoBaseUpload,
+    )
+
+    if ext is None:
+        ext = os.path.splitext(path)[1].lower()
     mapping = SUPPORTED_MIME.get(ext)
-    if not mapping:
+    if not mapping and ext not in PASSTHROUGH_EXTS:
         logging.debug("Skipping unsupported file: %s", path)
         return "skipped"
 
@@ -220,159 +673,342 @@ def convert_one(drive, path: str, file_size: Optional[int] = None):
     pdf_name = os.path.splitext(filename)[0] + ".pdf"
     out_path = os.path.join(OUTPUT_DIR, pdf_name)
 
+    # Standalone callers get one os.stat covering both size and mtime; the
+    # batch path already carries both from discovery's DirEntry.
+    if file_size is None or src_mtime_ns is None:
+        try:
+            st_in = os.stat(path)
+        except OSError as e:
+            logging.warning("Skipping %s (stat failed: %s)", filename, e)
+            return "skipped"
+        if file_size is None:
+            file_size = st_in.st_size
+        if src_mtime_ns is None:
+            src_mtime_ns = st_in.st_mtime_ns
+
     # Skip if existing PDF is newer or same mtime
-    if os.path.exists(out_path):
+    try:
+        out_mtime_ns = os.stat(out_path).st_mtime_ns
+    except OSError:
+        out_mtime_ns = None
+    if out_mtime_ns is not None and out_mtime_ns >= src_mtime_ns:
+        logging.info("Skipping (up-to-date): %s", filename)
+        return "skipped"
+
+    # Passthrough: the input is already a PDF, so just link or copy it over.
+    if ext in PASSTHROUGH_EXTS:
         try:
-            if os.path.getmtime(out_path) >= os.path.getmtime(path):
-                logging.info("Skipping (up-to-date): %s", filename)
-                return "skipped"
+            if out_mtime_ns is not None:
+                os.remove(out_path)  # os.link refuses to overwrite
+            os.link(path, out_path)
         except OSError:
-            pass
+            try:
+                shutil.copyfile(path, out_path)
+                _stamp_mtime(out_path, src_mtime_ns)
+            except OSError as e:
+                logging.error("Passthrough copy failed for %s: %s", filename, e)
+                return "failed"
+        logging.info("Copied already-PDF input: %s", filename)
+        return "success"
 
-    size = file_size if file_size is not None else os.path.getsize(path)
-    resumable = size > RESUMABLE_THRESHOLD_BYTES
-    logging.info(
-        "Converting %s (%s) -> %s",
-        filename,
-        _format_size(size),
-        pdf_name,
-    )
+    # Content-hash check: a touched or re-downloaded input whose bytes are
+    # unchanged needs no new conversion even though its mtime moved.
+    try:
+        digest = _digest(path)
+    except OSError as e:
+        logging.warning("Could not hash %s (%s); converting anyway.", filename, e)
+        digest = None
 
-    attempts = 3
-    backoff = 1.0
-    for attempt in range(1, attempts + 1):
-        start = time.time()
-        file_id = None
-        try:
-            src_mime, tgt_mime = mapping
-            upload_kwargs = {
-                "mimetype": src_mime,
-                "resumable": resumable,
-            }
-            if resumable:
-                upload_kwargs["chunksize"] = RESUMABLE_UPLOAD_CHUNK_SIZE
-            media = MediaFileUpload(path, **upload_kwargs)
-            metadata = {"name": filename, "mimeType": tgt_mime}
-            created = (
-                drive.files()
-                .create(body=metadata, media_body=media, fields="id")
-                .execute()
-            )
-            file_id = created["id"]
+    # Identical-content inputs serialize on a per-digest lock: the first one
+    # converts while its duplicates wait here, then find the finished PDF in
+    # the cache and reuse it instead of paying their own round-trip.
+    with _lock_for_digest(digest) if digest else nullcontext():
+        if digest:
+            cached_pdf = _cache_lookup(digest)
+            if cached_pdf == out_path and out_mtime_ns is not None:
+                logging.info("Skipping (content unchanged): %s", filename)
+                return "skipped"
+            if cached_pdf and cached_pdf != out_path and os.path.exists(cached_pdf):
+                # A previous run may have linked this duplicate already; the
+                # shared inode carries the twin's mtime, so the up-to-date
+                # check can't see it. Converge to skipped instead of
+                # re-linking forever.
+                try:
+                    if os.path.samefile(cached_pdf, out_path):
+                        logging.info(
+                            "Skipping (duplicate already linked): %s", filename
+                        )
+                        return "skipped"
+                except OSError:
+                    pass
+                try:
+                    if out_mtime_ns is not None:
+                        os.remove(out_path)  # os.link refuses to overwrite
+                    os.link(cached_pdf, out_path)
+                except OSError:
+                    try:
+                        shutil.copyfile(cached_pdf, out_path)
+                        _stamp_mtime(out_path, src_mtime_ns)
+                    except OSError as e:
+                        logging.warning(
+                            "Could not reuse %s for %s: %s",
+                            cached_pdf,
+                            filename,
+                            e,
+                        )
+                        cached_pdf = None
+                if cached_pdf:
+                    logging.info(
+                        "Reused PDF of identical input for %s", filename
+                    )
+                    return "success"
+
+        # Local fast path: zero network round-trips for the modern formats.
+        if ext in LOCAL_FAST_PATH:
+            soffice = _find_soffice()
+            if soffice:
+                start = time.time()
+                logging.info("Converting %s locally (LibreOffice) -> %s", filename, pdf_name)
+                if convert_local(soffice, path, out_path):
+                    logging.info(
+                        "Saved PDF: %s (%.2fs, local)", out_path, time.time() - start
+                    )
+                    _stamp_mtime(out_path, src_mtime_ns)
+                    if digest:
+                        _cache_store(digest, out_path)
+                    return "success"
+
+        size = file_size
+        resumable = size > RESUMABLE_THRESHOLD_BYTES
+        # _format_size is a positional arg and would run even with logging off,
+        # so gate it; everything else stays lazy %-style formatting.
+        if logging.getLogger().isEnabledFor(logging.INFO):
             logging.info(
-                "Uploaded %s (id=%s)%s",
+                "Converting %s (%s) -> %s",
                 filename,
-                file_id,
-                " [resumable]" if resumable else "",
+                _format_size(size),
+                pdf_name,
             )
 
-            request = drive.files().export_media(
-                fileId=file_id, mimeType="application/pdf"
-            )
-            with open(out_path, "wb") as f:
-                f.write(request.execute(num_retries=2))
+        attempts = 3
+        backoff = 1.0
+        for attempt in range(1, attempts + 1):
+            start = time.time()
+            file_id = None
+            delay_hint = None
+            _drive_gate.acquire()
+            try:
+                src_mime, tgt_mime = mapping
+                # Below the resumable threshold, create() with a non-resumable
+                # media body sends metadata + bytes as a single
+                # uploadType=multipart POST (one RTT); resumable uploads pay the
+                # extra session-initiation request only where chunking pays off.
+                metadata = {"name": filename, "mimeType": tgt_mime}
+                if folder_id:
+                    metadata["parents"] = [folder_id]
+                mm = None
+                try:
+                    if size:
+                        # Memory-map the source so upload reads stream straight
+                        # out of the page cache instead of being copied into
+                        # userspace bytes objects first.
+                        with open(path, "rb") as src:
+                            mm = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+                        if hasattr(mmap, "MADV_SEQUENTIAL"):
+                            mm.madvise(mmap.MADV_SEQUENTIAL)
+                        media = MediaIoBaseUpload(
+                            mm,
+                            mimetype=src_mime,
+                            resumable=resumable,
+                            chunksize=RESUMABLE_UPLOAD_CHUNK_SIZE,
+                        )
+                    else:
+                        # mmap cannot map empty files; let Drive reject them.
+                        media = MediaFileUpload(path, mimetype=src_mime)
+                    created = (
+                        drive.files()
+                        .create(body=metadata, media_body=media, fields="id")
+                        .execute(http=http)
+                    )
+                finally:
+                    if mm is not None:
+                        mm.close()
+                file_id = created["id"]
+                logging.info(
+                    "Uploaded %s (id=%s)%s",
+                    filename,
+                    file_id,
+                    " [resumable]" if resumable else "",
+                )
 
-            elapsed = time.time() - start
-            logging.info("Saved PDF: %s (%.2fs)", out_path, elapsed)
+                request = drive.files().export_media(
+                    fileId=file_id, mimeType="application/pdf"
+                )
+                if http is not None:
+                    # MediaIoBaseDownload pulls its transport off the request
+                    # object, so point it at this thread's http.
+                    request.http = http
+                # Stream the PDF to disk chunk by chunk so peak memory stays at
+                # one chunk per worker instead of the whole export.
+                with open(out_path, "wb") as f:
+                    downloader = MediaIoBaseDownload(
+                        f, request, chunksize=RESUMABLE_UPLOAD_CHUNK_SIZE
+                    )
+                    done = False
+                    while not done:
+                        dl_status, done = downloader.next_chunk(num_retries=2)
+                        if dl_status:
+                            logging.debug(
+                                "Export %s: %d%%",
+                                pdf_name,
+                                int(dl_status.progress() * 100),
+                            )
 
-            # Best-effort cleanup
-            try:
-                drive.files().delete(fileId=file_id).execute()
-            except Exception:
-                pass
-            return "success"
+                elapsed = time.time() - start
+                logging.info("Saved PDF: %s (%.2fs)", out_path, elapsed)
+                _stamp_mtime(out_path, src_mtime_ns)
+                if digest:
+                    _cache_store(digest, out_path)
+                _drive_gate.on_success()
+                return "success"
 
-        except HttpError as he:
-            status = getattr(he, "status_code", None) or getattr(
-                getattr(he, "resp", None), "status", None
-            )
-            if status == 400 and attempt == attempts:
-                logging.error(
-                    "Permanent HTTP 400 on %s after %d attempts: %s",
-                    filename,
-                    attempt,
-                    he,
+            except HttpError as he:
+                status = getattr(he, "status_code", None) or getattr(
+                    getattr(he, "resp", None), "status", None
                 )
-                return "failed"
-            logging.warning(
-                "HTTP error on %s attempt %d/%d: %s", filename, attempt, attempts, he
-            )
-        except (BrokenPipeError, OSError) as ioe:
-            if attempt == attempts:
-                logging.error(
-                    "I/O error on %s after %d attempts: %s", filename, attempt, ioe
+                delay_hint = _retry_after_seconds(he)
+                if _is_rate_limited(he, status):
+                    _drive_gate.on_rate_limit()
+                    retriable = True
+                else:
+                    retriable = status in _RETRIABLE_STATUSES
+                if not retriable:
+                    logging.error("Permanent HTTP %s on %s: %s", status, filename, he)
+                    return "failed"
+                if attempt == attempts:
+                    logging.error(
+                        "HTTP %s on %s after %d attempts: %s",
+                        status,
+                        filename,
+                        attempt,
+                        he,
+                    )
+                    return "failed"
+                logging.warning(
+                    "HTTP error on %s attempt %d/%d: %s", filename, attempt, attempts, he
                 )
-                return "failed"
-            logging.warning(
-                "I/O error on %s attempt %d/%d: %s", filename, attempt, attempts, ioe
-            )
-        except Exception as e:
-            if attempt == attempts:
-                logging.error(
-                    "Unexpected error on %s after %d attempts: %s",
+            except (BrokenPipeError, OSError) as ioe:
+                if attempt == attempts:
+                    logging.error(
+                        "I/O error on %s after %d attempts: %s", filename, attempt, ioe
+                    )
+                    return "failed"
+                logging.warning(
+                    "I/O error on %s attempt %d/%d: %s", filename, attempt, attempts, ioe
+                )
+            except Exception as e:
+                if attempt == attempts:
+                    logging.error(
+                        "Unexpected error on %s after %d attempts: %s",
+                        filename,
+                        attempt,
+                        e,
+                        exc_info=True,
+                    )
+                    return "failed"
+                logging.warning(
+                    "Retryable error on %s attempt %d/%d: %s",
                     filename,
                     attempt,
+                    attempts,
                     e,
-                    exc_info=True,
                 )
-                return "failed"
-            logging.warning(
-                "Retryable error on %s attempt %d/%d: %s",
-                filename,
-                attempt,
-                attempts,
-                e,
-            )
-        finally:
-            if file_id:
-                # Attempt cleanup between retries
-                try:
-                    drive.files().delete(fileId=file_id).execute()
-                except Exception:
-                    pass
+            finally:
+                _drive_gate.release()
+                if file_id:
+                    # Cleanup (including between retries) goes through the
+                    # batched delete queue, off the per-file critical path.
+                    _queue_delete(drive, file_id, http)
 
-        # Exponential backoff with jitter
-        time.sleep(backoff + uniform(0, 0.2))
-        backoff *= 2
+            # Sleep for whatever Retry-After told us; otherwise full-jitter
+            # backoff (uniform over the whole window) so workers that tripped
+            # the same error don't retry in lockstep.
+            if delay_hint is not None:
+                time.sleep(delay_hint)
+            else:
+                time.sleep(uniform(0, min(backoff, 60.0)))
+            backoff *= 2
 
-    return "failed"
+        return "failed"
 
 
-def process_all(drive):
-    entries = [os.path.join(INPUT_DIR, n) for n in os.listdir(INPUT_DIR)]
-    file_info = []
-    for path in entries:
-        ext = os.path.splitext(path)[1].lower()
-        if not os.path.isfile(path) or ext not in SUPPORTED_MIME:
-            continue
+def process_all(creds: Credentials):
+    # One scandir pass; DirEntry caches the stat result, so each input costs
+    # a single stat syscall instead of isfile+getsize+getmtime. The extension
+    # is computed once here and carried along rather than re-split later.
+    candidates = []
+    with os.scandir(INPUT_DIR) as it:
+        for entry in it:
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext in ELIGIBLE_EXTS and entry.is_file():
+                candidates.append((entry, ext))
+
+    def _stat_entry(item):
+        entry, ext = item
         try:
-            size = os.path.getsize(path)
+            st = entry.stat()
         except OSError as e:
-            logging.warning("Skipping %s (stat failed: %s)", path, e)
-            continue
-        file_info.append((path, size))
+            logging.warning("Skipping %s (stat failed: %s)", entry.path, e)
+            return None
+        return (entry.path, entry.name, st.st_size, st.st_mtime_ns, ext)
+
+    # Stats run across a thread pool: sequential per-file stats are the
+    # startup bottleneck when INPUT_DIR is a network mount.
+    file_info = []
+    if candidates:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, len(candidates))
+        ) as pool:
+            file_info = [info for info in pool.map(_stat_entry, candidates) if info]
 
     if not file_info:
         logging.warning("Input directory is empty or no supported files: %s", INPUT_DIR)
         return
 
-    file_info.sort(key=lambda item: os.path.basename(item[0]).lower())
+    file_info.sort(key=lambda item: item[1].lower())
     total = len(file_info)
-    logging.info("Starting batch: %d files (sequential)", total)
+    workers = min(MAX_WORKERS, total)
+    logging.info("Starting batch: %d files (%d workers)", total, workers)
     start_batch = time.time()
+    drive = build_drive(creds)
+    folder_id = ensure_staging_folder(drive)
     results = {"success": 0, "failed": 0, "skipped": 0}
-    for index, (path, size) in enumerate(file_info, start=1):
-        filename = os.path.basename(path)
-        loader_msg = f"[{index}/{total}] Converting {filename}..."
-        print(loader_msg, end="", flush=True)
-        try:
-            status = convert_one(drive, path, size)
-        except Exception as e:
-            logging.error("Failed converting %s: %s", path, e)
-            status = "failed"
-        if status in results:
-            results[status] += 1
-        print(f" {status.upper()}")
+    results_lock = threading.Lock()
+
+    def _worker(path, size, mtime_ns, ext):
+        return convert_one(
+            drive, path, size, folder_id, mtime_ns, ext, _http_for_thread(creds)
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_worker, path, size, mtime_ns, ext): name
+            for path, name, size, mtime_ns, ext in file_info
+        }
+        for index, future in enumerate(
+            concurrent.futures.as_completed(futures), start=1
+        ):
+            filename = futures[future]
+            try:
+                status = future.result()
+            except Exception as e:
+                logging.error("Failed converting %s: %s", filename, e)
+                status = "failed"
+            with results_lock:
+                if status in results:
+                    results[status] += 1
+            print(f"[{index}/{total}] {filename}: {status.upper()}", flush=True)
+    flush_deletes(drive)
     elapsed = time.time() - start_batch
     logging.info(
         "Batch complete in %.2fs | success=%d skipped=%d failed=%d",
@@ -393,8 +1029,8 @@ def main():
         ensure_directories()
         validate_embedded_credentials()
         creds = load_or_authorize()
-        drive = build_drive(creds)
-        process_all(drive)
+        start_token_refresher(creds)
+        process_all(creds)
         logging.info("Done.")
         logging.info("Place additional files in '%s' and run again.", INPUT_DIR)
     except SystemExit as se: